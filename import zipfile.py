@@ -1,44 +1,198 @@
 import zipfile
 import os
+import math
+import posixpath
+import xml.etree.ElementTree as ET
+from fnmatch import fnmatchcase
+import imagecodecs
+import numpy as np
+import png
 import rasterio
-from rasterio.plot import reshape_as_image
 from PIL import Image
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+# Opzioni GDAL per leggere il JP2 direttamente dallo zip tramite /vsizip/.
+# La cache dei blocchi (MB) va impostata prima del primo accesso: 512 MB
+# bastano per un tile 10980x10980 senza rileggere blocchi gia' decodificati.
+GDAL_ENV = {
+    'GDAL_CACHEMAX': 512,
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'CPL_VSIL_ZIP_ALLOWED_EXTENSIONS': '.zip',
+}
+
+# Buffer di scrittura del PNG (1 MiB): Pillow e pypng scrivono a blocchi
+# piccoli, che su NFS o dischi lenti diventano molte syscall
+PNG_WRITE_BUFSIZE = 1 << 20
+
+# Posizione fissa del TCI nel formato SAFE. In fnmatch '*' attraversa anche '/':
+# per L1C c'e' un solo IMG_DATA/*_TCI.jp2, per L2A il pattern trova i TCI in
+# R10m, R20m e R60m, e va scelto quello a 10 m (vedi _prefer_10m)
+TCI_MEMBER_PATTERN = '*GRANULE/*/IMG_DATA/*TCI*.jp2'
+
+try:
+    # Encoder PNG SIMD opzionale, molto piu' veloce di libpng
+    import fpnge
+except ImportError:
+    fpnge = None
 
 def process_sentinel_zip(zip_path):
     # Ottieni la cartella in cui si trova lo zip
     zip_dir = os.path.dirname(zip_path)
     
-    # Estrai lo zip nella stessa cartella
+    # Cerca il file TCI dentro lo zip, senza estrarre nulla su disco
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(zip_dir)
-    
-    # Trova la cartella estratta (assume che ci sia solo una cartella grande dentro lo zip)
-    extracted_folders = [f for f in os.listdir(zip_dir) if os.path.isdir(os.path.join(zip_dir, f))]
-    extracted_folders.sort(key=lambda f: os.path.getmtime(os.path.join(zip_dir, f)), reverse=True)
-    
-    for folder in extracted_folders:
-        folder_path = os.path.join(zip_dir, folder)
-        # Cerca il file TCI (di solito ha "TCI" nel nome e termina con .jp2)
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if 'TCI' in file and file.endswith('.jp2'):
-                    tci_path = os.path.join(root, file)
-                    print(f"Trovato file TCI: {tci_path}")
-                    return convert_to_png(tci_path, zip_dir)
-
-    print("File TCI non trovato.")
-    return None
-
-def convert_to_png(tci_path, output_dir):
-    with rasterio.open(tci_path) as src:
-        img = src.read()
-        img = reshape_as_image(img)  # Risistema da (3, H, W) a (H, W, 3)
-        img = Image.fromarray(img)
+        member = _find_tci_member(zip_ref)
+
+    if member is None:
+        print("File TCI non trovato.")
+        return None
+
+    # GDAL legge il JP2 direttamente dall'archivio
+    tci_path = f"/vsizip/{os.path.abspath(zip_path)}/{member}"
+    print(f"Trovato file TCI: {tci_path}")
+    return convert_to_png(tci_path, zip_dir)
+
+def _find_tci_member(zip_ref):
+    # Il manifest.safe elenca tutti i file del prodotto: e' la fonte piu' affidabile
+    member = _find_tci_in_manifest(zip_ref)
+    if member is not None:
+        return member
+
+    # Manifest assente o illeggibile: cerca per nome nell'elenco dello zip
+    return _prefer_10m([info.filename for info in zip_ref.infolist() if _is_tci_member(info)])
+
+def _prefer_10m(names):
+    # Il TCI L2A esiste a 10, 20 e 60 m: si converte sempre quello a piena risoluzione
+    for name in names:
+        if posixpath.basename(name).endswith('_10m.jp2'):
+            return name
+    return names[0] if names else None
+
+def _find_tci_in_manifest(zip_ref):
+    manifests = [name for name in zip_ref.namelist()
+                 if posixpath.basename(name) == 'manifest.safe']
+    if not manifests:
+        return None
+
+    # Il manifest sta nella radice della cartella SAFE; gli href sono relativi a essa
+    manifest = min(manifests, key=lambda name: name.count('/'))
+    safe_root = posixpath.dirname(manifest)
+    candidates = []
+    try:
+        with zip_ref.open(manifest) as f:
+            data_object_id = ''
+            # Lettura in streaming; nei prodotti L2A ci sono TCI a 10, 20 e 60 m
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                tag = elem.tag.rsplit('}', 1)[-1]
+                if tag == 'dataObject':
+                    # Un fileLocation fuori da un dataObject non appartiene al TCI
+                    data_object_id = elem.get('ID', '') if event == 'start' else ''
+                elif event == 'start' and tag == 'fileLocation' and 'TCI' in data_object_id:
+                    member = posixpath.normpath(posixpath.join(safe_root, elem.get('href', '')))
+                    # Il 10 m e' quello voluto: inutile leggere il resto del manifest
+                    if 'TCI_10m' in data_object_id:
+                        return _existing_member(zip_ref, member)
+                    candidates.append(member)
+    except ET.ParseError:
+        return None
+    return _existing_member(zip_ref, _prefer_10m(candidates))
+
+def _existing_member(zip_ref, member):
+    # Il manifest potrebbe citare file non presenti nell'archivio
+    if member is None:
+        return None
+    try:
+        zip_ref.getinfo(member)
+    except KeyError:
+        return None
+    return member
+
+def _is_tci_member(info):
+    return fnmatchcase(info.filename, TCI_MEMBER_PATTERN)
+
+def convert_to_png(tci_path, output_dir, compress_level=1, low_memory=False, max_dim=None,
+                   paletted=False):
+    # compress_level va da 0 a 9: 1 produce un PNG piu' grande (~30-50%) ma
+    # la compressione zlib e' molto piu' veloce rispetto al default (6).
+    # fpnge usa un percorso Deflate fisso e ignora compress_level.
+    # Con low_memory=True l'immagine viene letta a strisce e scritta riga per
+    # riga con pypng: memoria limitata a pochi MB, ma encoding piu' lento.
+    # Con max_dim l'immagine viene ridotta (media) in modo che il lato maggiore
+    # non superi max_dim pixel: GDAL legge dalle overview del JP2 invece di
+    # decodificare la risoluzione piena, utile per anteprime.
+    # Con paletted=True i colori vengono quantizzati in una palette adattiva
+    # di 256 colori: file piu' piccolo e compressione piu' rapida, ma si perde
+    # la fedelta' colorimetrica del JP2. Solo per PNG di anteprima.
+    if paletted and low_memory:
+        raise ValueError("paletted richiede l'immagine intera e non e' compatibile con low_memory")
+    if max_dim is not None and max_dim < 1:
+        raise ValueError(f"max_dim deve essere almeno 1, ricevuto {max_dim}")
+
+    with rasterio.Env(**GDAL_ENV), rasterio.open(tci_path) as src:
         png_path = os.path.join(output_dir, 'TCI_converted.png')
-        img.save(png_path)
+        scale = _downscale_factor(src, max_dim)
+        if low_memory:
+            _write_png_streaming(src, png_path, compress_level, scale)
+            print(f"Immagine PNG salvata in: {png_path}")
+            return png_path
+
+        # Entrambi gli encoder accettano direttamente un ndarray (H, W, 3) RGB contiguo
+        if scale > 1:
+            width, height = _output_size(src, scale)
+            out_shape = (src.count, height, width)
+            rgb = _interleave(src.read(out_shape=out_shape, resampling=Resampling.average))
+        else:
+            rgb = _interleave(src.read())
+        with open(png_path, 'wb', buffering=PNG_WRITE_BUFSIZE) as f:
+            if paletted:
+                img = Image.fromarray(rgb).convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
+                img.save(f, format='PNG', compress_level=compress_level)
+            elif fpnge is not None:
+                f.write(fpnge.fromNP(rgb))
+            else:
+                f.write(imagecodecs.png_encode(rgb, level=compress_level))
         print(f"Immagine PNG salvata in: {png_path}")
         return png_path
 
-# Esempio di uso:
-zip_path= 
-process_sentinel_zip(zip_path)
\ No newline at end of file
+def _downscale_factor(src, max_dim):
+    if max_dim is None:
+        return 1
+    return max(1, math.ceil(max(src.width, src.height) / max_dim))
+
+def _output_size(src, scale):
+    # Su raster non quadrati il lato minore potrebbe ridursi a 0 pixel
+    return max(1, src.width // scale), max(1, src.height // scale)
+
+def _interleave(planar):
+    # Da (bande, H, W) a (H, W, bande) contiguo con un'unica copia
+    return np.ascontiguousarray(planar.transpose(1, 2, 0))
+
+def _write_png_streaming(src, png_path, compress_level, scale):
+    width, height = _output_size(src, scale)
+    writer = png.Writer(width=width, height=height, greyscale=False,
+                        bitdepth=8, compression=compress_level)
+    with open(png_path, 'wb', buffering=PNG_WRITE_BUFSIZE) as f:
+        writer.write(f, _iter_rows(src, scale))
+
+def _iter_rows(src, scale):
+    # Legge strisce alte quanto un blocco nativo del JP2, a larghezza piena;
+    # con scale > 1 ogni striscia copre scale volte piu' righe sorgente
+    width, height = _output_size(src, scale)
+    block_height = src.block_shapes[0][0]
+    for row_off in range(0, height, block_height):
+        strip_height = min(block_height, height - row_off)
+        # Con un lato ridotto a 1 pixel la finestra non deve uscire dal raster
+        window = Window(0, row_off * scale, min(width * scale, src.width),
+                        min(strip_height * scale, src.height - row_off * scale))
+        strip = src.read(window=window, out_shape=(src.count, strip_height, width),
+                         resampling=Resampling.average)
+        # Da (3, h, W) a righe interleaved RGB di W * 3 byte
+        rows = _interleave(strip).reshape(strip_height, -1)
+        for row in rows:
+            yield row.tobytes()
+
+# Esempio di uso: python "import zipfile.py" <percorso dello zip>
+if __name__ == "__main__":
+    import sys
+    process_sentinel_zip(sys.argv[1])
@@ -1,17 +1,127 @@
 import os
 import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 from browser_use import BrowserUse
 
 logger = logging.getLogger(__name__)
 
+COPERNICUS_HOME_URL = "https://scihub.copernicus.eu/dhus/#/home"
+
+EXTRACT_RESULTS_JS = """() => Array.from(document.querySelectorAll('.search-result-item')).map(el => ({
+    id: el.getAttribute('data-product-id') || 'Unknown',
+    title: el.querySelector('.product-title')?.textContent || 'Unknown',
+    date: el.querySelector('.acquisition-date')?.textContent || 'Unknown',
+    source: 'Copernicus/Browser'
+}))"""
+
+class BrowserPool:
+    """
+    Pool of pre-warmed browser sessions
+    
+    Sessions are started with BrowserUse.start_session() and torn down with
+    BrowserUse.end_session(), which takes no session argument and ends the
+    browser it launched. close() therefore makes a single end_session() call,
+    which is only a complete teardown for size=1; larger pools would need a
+    factory with per-session teardown.
+    """
+    
+    def __init__(self, size: int, browser_factory: BrowserUse):
+        self.size = size
+        self.browser_factory = browser_factory
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+    
+    async def start(self) -> None:
+        """Launch all sessions up front so acquire() never pays a cold start"""
+        async with self._start_lock:
+            if self._started:
+                return
+            sessions = await asyncio.gather(
+                *[self.browser_factory.start_session() for _ in range(self.size)]
+            )
+            for session in sessions:
+                self._idle.put_nowait(session)
+            self._started = True
+            logger.info(f"Started browser pool with {self.size} sessions")
+    
+    async def acquire(self) -> Any:
+        """Return an idle session, waiting if all of them are in use"""
+        await self.start()
+        return await self._idle.get()
+    
+    async def release(self, session: Any) -> None:
+        """Reset cookies and URL, then hand the session back to the pool"""
+        try:
+            await session.context.clear_cookies()
+            await session.goto("about:blank")
+        except Exception as e:
+            logger.error(f"Error resetting browser session: {str(e)}")
+        self._idle.put_nowait(session)
+    
+    async def close(self) -> None:
+        """End the pooled session through the factory that started it"""
+        async with self._start_lock:
+            if not self._started:
+                return
+            # Page-like session.close() would leave the browser process running
+            await self.browser_factory.end_session()
+            self._idle = asyncio.Queue()
+            self._started = False
+
 class SatelliteBrowserAgent:
-    """Component for browser-based satellite data interactions"""
+    """
+    Component for browser-based satellite data interactions
+    
+    For multi-step flows (e.g. search then download) use the agent as an
+    async context manager, so one logged-in session is reused across calls:
+    
+        async with SatelliteBrowserAgent() as agent:
+            products = await agent.search_copernicus_browser(location, time_period)
+            await agent.download_product_browser(products[0]["id"])
+    
+    Outside the context manager each call takes a session from the pool
+    and shuts the browser down when done, as a standalone call always did.
+    To keep the browser warm between standalone calls, call start() first
+    and close() once finished; until close() is called the headless browser
+    keeps running. Calls on one agent are serialized, since they all drive
+    the same page.
+    """
     
     def __init__(self):
         self.browser = BrowserUse()
+        # The agent drives a single page at a time, so one warm session is enough
+        self.pool = BrowserPool(size=1, browser_factory=self.browser)
         self.current_session = None
+        self._session_lock = asyncio.Lock()
+        self._keep_warm = False
+    
+    async def __aenter__(self) -> "SatelliteBrowserAgent":
+        # __aexit__ does not run if entering fails, so shut the pool down here
+        try:
+            await self._open_session()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.current_session:
+            await self._close_session()
+        await self.close()
+    
+    async def start(self) -> None:
+        """Warm up the browser pool and keep it running until close()"""
+        self._keep_warm = True
+        await self.pool.start()
+    
+    async def close(self) -> None:
+        """Shut down the browser pool"""
+        self._keep_warm = False
+        await self.pool.close()
     
     async def search_copernicus_browser(self, 
                                        location: str, 
@@ -29,52 +139,39 @@ class SatelliteBrowserAgent:
             List of found products
         """
         try:
-            # Start a browser session
-            self.current_session = await self.browser.start_session()
-            
-            # Navigate to Copernicus Open Access Hub
-            await self.current_session.goto("https://scihub.copernicus.eu/dhus/#/home")
-            logger.info("Navigated to Copernicus Open Access Hub")
-            
-            # Wait for page to load completely
-            await self.current_session.wait_for_load_state("networkidle")
-            
-            # Check if login is needed and handle authentication
-            if await self._need_login():
-                await self._perform_login()
-            
-            # Navigate to search interface
-            await self.current_session.click("text=Open search")
-            await self.current_session.wait_for_selector("input[placeholder='Search area']")
-            
-            # Enter location in search box
-            await self.current_session.fill("input[placeholder='Search area']", location)
-            await self.current_session.press("input[placeholder='Search area']", "Enter")
-            
-            # Set time period
-            await self._set_time_period(time_period)
-            
-            # Set image type filter (e.g., select Sentinel-2 for optical)
-            if image_type.lower() == "optical":
-                await self.current_session.click("text=Sentinel-2")
-            elif image_type.lower() == "radar" or image_type.lower() == "sar":
-                await self.current_session.click("text=Sentinel-1")
-            
-            # Submit search
-            await self.current_session.click("button:has-text('Search')")
-            await self.current_session.wait_for_selector(".search-results")
-            
-            # Extract search results
-            return await self._extract_search_results()
+            async with self._session_scope() as fresh:
+                # Start from a freshly loaded Copernicus Open Access Hub, so no
+                # state from a previous search is left on the page; a session
+                # opened just now has already loaded it
+                if not fresh:
+                    await self._goto_home()
+                
+                # Locators are strict, so every one below takes .first to keep the
+                # first-match behaviour of page.click/fill for loose text selectors
+                
+                # Navigate to search interface
+                await self.current_session.locator("text=Open search").first.click()
+                
+                # Enter location in search box
+                search_box = self.current_session.locator("input[placeholder='Search area']").first
+                await search_box.fill(location)
+                await search_box.press("Enter")
+                
+                # Set filters one after the other: both drive widgets on the same
+                # page, and an open date dropdown would swallow the mission click
+                await self._set_time_period(time_period)
+                await self._set_image_type(image_type)
+                
+                # Submit search
+                await self.current_session.locator("button:has-text('Search')").first.click()
+                await self.current_session.locator(".search-results").first.wait_for()
+                
+                # Extract search results
+                return await self._extract_search_results()
             
         except Exception as e:
             logger.error(f"Error during browser search: {str(e)}")
             return []
-        finally:
-            # Close the session when done
-            if self.current_session:
-                await self.browser.end_session()
-                self.current_session = None
     
     async def download_product_browser(self, 
                                      product_id: str, 
@@ -92,36 +189,81 @@ class SatelliteBrowserAgent:
         try:
             os.makedirs(download_dir, exist_ok=True)
             
-            # Start browser session if needed
-            if not self.current_session:
-                self.current_session = await self.browser.start_session()
-                await self.current_session.goto("https://scihub.copernicus.eu/dhus/#/home")
+            async with self._session_scope():
+                # Navigate to product page
+                await self.current_session.goto(f"https://scihub.copernicus.eu/dhus/#/details?id={product_id}")
                 
-                if await self._need_login():
-                    await self._perform_login()
-            
-            # Navigate to product page
-            await self.current_session.goto(f"https://scihub.copernicus.eu/dhus/#/details?id={product_id}")
-            await self.current_session.wait_for_selector("button:has-text('Download')")
-            
-            # Configure download location
-            await self.current_session.context.set_default_download_directory(download_dir)
-            
-            # Initiate download
-            download_promise = self.current_session.wait_for_download()
-            await self.current_session.click("button:has-text('Download')")
-            download = await download_promise
-            
-            # Wait for download to complete
-            downloaded_path = await download.path()
-            logger.info(f"Downloaded file to {downloaded_path}")
-            
-            return downloaded_path
+                # Configure download location
+                await self.current_session.context.set_default_download_directory(download_dir)
+                
+                # Initiate download
+                download_promise = self.current_session.wait_for_download()
+                await self.current_session.locator("button:has-text('Download')").first.click()
+                download = await download_promise
+                
+                # Wait for download to complete
+                downloaded_path = await download.path()
+                logger.info(f"Downloaded file to {downloaded_path}")
+                
+                return downloaded_path
             
         except Exception as e:
             logger.error(f"Error downloading product {product_id}: {str(e)}")
             return None
     
+    @asynccontextmanager
+    async def _session_scope(self):
+        """
+        Reuse the current session, or open a one-shot session for this call
+        
+        Yields True when the session was opened for this call, i.e. the home
+        page has just been loaded.
+        """
+        async with self._session_lock:
+            if self.current_session:
+                yield False
+                return
+            
+            await self._open_session()
+            try:
+                yield True
+            finally:
+                await self._close_session()
+                # Without start() nobody is expected to call close() later
+                if not self._keep_warm:
+                    await self.pool.close()
+    
+    async def _open_session(self) -> None:
+        """Take a warm session from the pool and log in if needed"""
+        self.current_session = await self.pool.acquire()
+        try:
+            await self._goto_home()
+            
+            # Check if login is needed and handle authentication
+            if await self._need_login():
+                await self._perform_login()
+        except Exception:
+            await self._close_session()
+            raise
+    
+    async def _close_session(self) -> None:
+        """Hand the current session back to the pool"""
+        await self.pool.release(self.current_session)
+        self.current_session = None
+    
+    async def _goto_home(self) -> None:
+        """Load Copernicus Open Access Hub, reloading it if already there"""
+        # goto() to the same #/home URL is only a fragment navigation and
+        # would keep the current page state, so an actual reload is needed
+        if self.current_session.url == COPERNICUS_HOME_URL:
+            await self.current_session.reload()
+        else:
+            await self.current_session.goto(COPERNICUS_HOME_URL)
+        logger.info("Navigated to Copernicus Open Access Hub")
+        
+        # Wait for page to load completely
+        await self.current_session.wait_for_load_state("networkidle")
+    
     async def _need_login(self) -> bool:
         """Check if login is required"""
         login_button = await self.current_session.query_selector("text=Sign in")
@@ -136,72 +278,54 @@ class SatelliteBrowserAgent:
             logger.error("Login credentials not found in environment variables")
             raise ValueError("Copernicus credentials not configured")
         
-        await self.current_session.click("text=Sign in")
-        await self.current_session.wait_for_selector("input[name='username']")
+        await self.current_session.locator("text=Sign in").first.click()
         
-        await self.current_session.fill("input[name='username']", username)
-        await self.current_session.fill("input[name='password']", password)
-        await self.current_session.click("button:has-text('Login')")
+        await self.current_session.locator("input[name='username']").first.fill(username)
+        await self.current_session.locator("input[name='password']").first.fill(password)
+        await self.current_session.locator("button:has-text('Login')").first.click()
         
         # Wait for login to complete
-        await self.current_session.wait_for_selector("text=Sign out", timeout=10000)
+        await self.current_session.locator("text=Sign out").first.wait_for(timeout=10000)
         logger.info("Successfully logged in to Copernicus")
     
     async def _set_time_period(self, time_period: str) -> None:
         """Set the time period for search"""
         # Click on the date filter
-        await self.current_session.click(".date-filter")
+        await self.current_session.locator(".date-filter").first.click()
         
         if "last" in time_period.lower():
             # Handle relative time periods
             if "day" in time_period.lower():
                 days = int(time_period.lower().split("last")[1].strip().split()[0])
-                await self.current_session.click("text=Last 24 hours")
+                await self.current_session.locator("text=Last 24 hours").first.click()
             elif "week" in time_period.lower():
-                await self.current_session.click("text=Last week")
+                await self.current_session.locator("text=Last week").first.click()
             elif "month" in time_period.lower():
-                await self.current_session.click("text=Last month")
+                await self.current_session.locator("text=Last month").first.click()
             else:
                 # Default to custom date range
-                await self.current_session.click("text=Custom range")
+                await self.current_session.locator("text=Custom range").first.click()
                 # Set appropriate dates based on the request
         elif "to" in time_period:
             # Handle explicit date ranges
             start_date, end_date = time_period.split("to")
-            await self.current_session.click("text=Custom range")
-            await self.current_session.fill(".start-date input", start_date.strip())
-            await self.current_session.fill(".end-date input", end_date.strip())
+            await self.current_session.locator("text=Custom range").first.click()
+            await self.current_session.locator(".start-date input").first.fill(start_date.strip())
+            await self.current_session.locator(".end-date input").first.fill(end_date.strip())
         else:
             # Default to custom range with single date
-            await self.current_session.click("text=Custom range")
-            await self.current_session.fill(".start-date input", time_period.strip())
-            await self.current_session.fill(".end-date input", time_period.strip())
+            await self.current_session.locator("text=Custom range").first.click()
+            await self.current_session.locator(".start-date input").first.fill(time_period.strip())
+            await self.current_session.locator(".end-date input").first.fill(time_period.strip())
+    
+    async def _set_image_type(self, image_type: str) -> None:
+        """Set the image type filter (e.g., select Sentinel-2 for optical)"""
+        if image_type.lower() == "optical":
+            await self.current_session.locator("text=Sentinel-2").first.click()
+        elif image_type.lower() == "radar" or image_type.lower() == "sar":
+            await self.current_session.locator("text=Sentinel-1").first.click()
     
     async def _extract_search_results(self) -> List[Dict[str, Any]]:
         """Extract search results from the page"""
-        results = []
-        
-        # Get all result items
-        result_elements = await self.current_session.query_selector_all(".search-result-item")
-        
-        for element in result_elements:
-            try:
-                # Extract product information
-                title = await element.query_selector(".product-title")
-                title_text = await title.text_content() if title else "Unknown"
-                
-                product_id = await element.get_attribute("data-product-id") or "Unknown"
-                
-                date_element = await element.query_selector(".acquisition-date")
-                date = await date_element.text_content() if date_element else "Unknown"
-                
-                results.append({
-                    "id": product_id,
-                    "title": title_text,
-                    "date": date,
-                    "source": "Copernicus/Browser"
-                })
-            except Exception as e:
-                logger.error(f"Error extracting result: {str(e)}")
-        
-        return results
\ No newline at end of file
+        # Collect all fields in the page with a single round-trip
+        return await self.current_session.evaluate(EXTRACT_RESULTS_JS)
@@ -0,0 +1,110 @@
+import importlib.util
+import io
+import os
+import zipfile
+
+import pytest
+
+# Lo script importa gli encoder a livello di modulo
+for dependency in ("numpy", "png", "rasterio", "imagecodecs", "PIL"):
+    pytest.importorskip(dependency)
+
+SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "..", "import zipfile.py")
+spec = importlib.util.spec_from_file_location("sentinel_zip", SCRIPT_PATH)
+sentinel_zip = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sentinel_zip)
+
+L1C_TCI = "GRANULE/L1C_T32TQM/IMG_DATA/T32TQM_20240101T100000_TCI.jp2"
+L2A_IMG_DATA = "GRANULE/L2A_T32TQM/IMG_DATA/"
+L2A_TCI = {
+    resolution: f"{L2A_IMG_DATA}R{resolution}/T32TQM_20240101T100000_TCI_{resolution}.jp2"
+    for resolution in ("10m", "20m", "60m")
+}
+
+
+def make_zip(files, manifest=None, safe_root="S2A_PRODUCT.SAFE"):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        if manifest is not None:
+            zip_ref.writestr(f"{safe_root}/manifest.safe", manifest)
+        for name in files:
+            zip_ref.writestr(f"{safe_root}/{name}", b"")
+    return zipfile.ZipFile(buffer)
+
+
+def data_object(object_id, href):
+    return (
+        f'<dataObject ID="{object_id}"><byteStream mimeType="application/octet-stream">'
+        f'<fileLocation locatorType="URL" href="./{href}"/></byteStream></dataObject>'
+    )
+
+
+def make_manifest(*elements):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<xfdu:XFDU xmlns:xfdu="urn:ccsds:schema:xfdu:1"><dataObjectSection>'
+        + "".join(elements)
+        + "</dataObjectSection></xfdu:XFDU>"
+    )
+
+
+def test_layout_finds_l1c_tci():
+    zip_ref = make_zip([L1C_TCI, "GRANULE/L1C_T32TQM/IMG_DATA/T32TQM_20240101T100000_B02.jp2"])
+    assert sentinel_zip._find_tci_member(zip_ref) == f"S2A_PRODUCT.SAFE/{L1C_TCI}"
+
+
+def test_layout_prefers_l2a_10m_regardless_of_member_order():
+    zip_ref = make_zip([L2A_TCI["60m"], L2A_TCI["20m"], L2A_TCI["10m"]])
+    assert sentinel_zip._find_tci_member(zip_ref) == f"S2A_PRODUCT.SAFE/{L2A_TCI['10m']}"
+
+
+def test_layout_ignores_tci_outside_img_data():
+    zip_ref = make_zip(["GRANULE/L1C_T32TQM/QI_DATA/T32TQM_TCI.jp2"])
+    assert sentinel_zip._find_tci_member(zip_ref) is None
+
+
+def test_prefer_10m_falls_back_to_first_match():
+    assert sentinel_zip._prefer_10m([L2A_TCI["60m"], L2A_TCI["20m"]]) == L2A_TCI["60m"]
+    assert sentinel_zip._prefer_10m([]) is None
+
+
+def test_manifest_selects_l2a_10m_entry():
+    manifest = make_manifest(
+        data_object("IMG_DATA_Band_TCI_60m_Tile1_Data", L2A_TCI["60m"]),
+        data_object("IMG_DATA_Band_TCI_20m_Tile1_Data", L2A_TCI["20m"]),
+        data_object("IMG_DATA_Band_TCI_10m_Tile1_Data", L2A_TCI["10m"]),
+    )
+    zip_ref = make_zip(L2A_TCI.values(), manifest)
+    assert sentinel_zip._find_tci_in_manifest(zip_ref) == f"S2A_PRODUCT.SAFE/{L2A_TCI['10m']}"
+
+
+def test_manifest_finds_l1c_tci():
+    manifest = make_manifest(
+        data_object("IMG_DATA_Band_B02_Tile1_Data", "GRANULE/L1C_T32TQM/IMG_DATA/T32TQM_B02.jp2"),
+        data_object("IMG_DATA_Band_TCI_Tile1_Data", L1C_TCI),
+    )
+    zip_ref = make_zip([L1C_TCI], manifest)
+    assert sentinel_zip._find_tci_in_manifest(zip_ref) == f"S2A_PRODUCT.SAFE/{L1C_TCI}"
+
+
+def test_manifest_ignores_file_location_outside_data_object():
+    # La fileLocation sciolta non va attribuita all'ultimo dataObject del TCI
+    manifest = make_manifest(
+        data_object("IMG_DATA_Band_TCI_60m_Tile1_Data", L2A_TCI["60m"]),
+        f'<fileLocation locatorType="URL" href="./{L2A_TCI["10m"]}"/>',
+    )
+    zip_ref = make_zip([L2A_TCI["10m"]], manifest)
+    assert sentinel_zip._find_tci_in_manifest(zip_ref) is None
+
+
+def test_manifest_pointing_at_missing_member_falls_back_to_layout():
+    manifest = make_manifest(data_object("IMG_DATA_Band_TCI_10m_Tile1_Data", L2A_TCI["10m"]))
+    zip_ref = make_zip([L2A_TCI["20m"]], manifest)
+    assert sentinel_zip._find_tci_in_manifest(zip_ref) is None
+    assert sentinel_zip._find_tci_member(zip_ref) == f"S2A_PRODUCT.SAFE/{L2A_TCI['20m']}"
+
+
+def test_malformed_manifest_falls_back_to_layout():
+    zip_ref = make_zip([L1C_TCI], manifest="<xfdu:XFDU><dataObjectSection>")
+    assert sentinel_zip._find_tci_in_manifest(zip_ref) is None
+    assert sentinel_zip._find_tci_member(zip_ref) == f"S2A_PRODUCT.SAFE/{L1C_TCI}"